@@ -1,5 +1,12 @@
 """MCP SSH Session server."""
-from .server import mcp
 
 __version__ = "0.1.0"
 __all__ = ["mcp"]
+
+
+def __getattr__(name):
+    # Import the server on first use so __main__ can load SSH_ENV_FILE before it runs
+    if name == "mcp":
+        from .server import mcp
+        return mcp
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
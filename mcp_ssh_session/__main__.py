@@ -7,11 +7,11 @@ if env_file:
     from dotenv import load_dotenv
     load_dotenv(env_file, override=True)
 
-from .server import mcp
-
 
 def main():
     """Main entry point for the MCP SSH session server."""
+    from .server import mcp
+
     # Run in SSE mode if SSE_PORT is set, otherwise stdio
     sse_port = os.getenv("SSE_PORT")
     if sse_port:
@@ -12,7 +12,7 @@ import uuid
 from datetime import datetime
 
 from .datastructures import CommandStatus, RunningCommand
-from .validation import OutputLimiter
+from .validation import OutputLimiter, utf8_size, validate_command
 
 
 class CommandExecutor:
@@ -38,7 +38,7 @@ class CommandExecutor:
         logger.info(f"[EXEC_REQ] host={host}, cmd={command[:100]}..., timeout={timeout}")
 
         # Validate command
-        is_valid, error_msg = self._session_manager._command_validator.validate_command(command)
+        is_valid, error_msg = validate_command(command)
         if not is_valid:
             logger.warning(f"[EXEC_INVALID] {error_msg}")
             return "", error_msg, 1
@@ -459,7 +459,7 @@ class CommandExecutor:
         # Initialize output limiter
         output_limiter = OutputLimiter()
         # Estimate current size
-        output_limiter.current_size = len(cmd.stdout.encode('utf-8'))
+        output_limiter.current_size = utf8_size(cmd.stdout)
 
         last_log_time = 0.0
 
@@ -481,10 +481,11 @@ class CommandExecutor:
                             return
 
                     if cmd.shell.recv_ready():
-                        chunk = cmd.shell.recv(65535).decode('utf-8', errors='replace')
+                        chunk = cmd.shell.recv(65535)
                         if chunk:
-                            # Apply output limiting
-                            chunk_to_add, should_continue = output_limiter.add_chunk(chunk)
+                            # Apply output limiting on the raw bytes, then decode what is kept
+                            data_to_add, should_continue = output_limiter.add_bytes(chunk)
+                            chunk_to_add = data_to_add.decode('utf-8', errors='replace')
                             
                             with self._lock:
                                 if command_id in self._commands:
@@ -595,7 +596,7 @@ class CommandExecutor:
         # Initialize output limiter
         output_limiter = OutputLimiter()
         # Estimate current size
-        output_limiter.current_size = len(cmd.stdout.encode('utf-8'))
+        output_limiter.current_size = utf8_size(cmd.stdout)
 
         last_log_time = 0.0
 
@@ -608,10 +609,11 @@ class CommandExecutor:
 
                 try:
                     if cmd.shell.recv_ready():
-                        chunk = cmd.shell.recv(65535).decode('utf-8', errors='replace')
+                        chunk = cmd.shell.recv(65535)
                         if chunk:
-                            # Apply output limiting
-                            chunk_to_add, should_continue = output_limiter.add_chunk(chunk)
+                            # Apply output limiting on the raw bytes, then decode what is kept
+                            data_to_add, should_continue = output_limiter.add_bytes(chunk)
+                            chunk_to_add = data_to_add.decode('utf-8', errors='replace')
 
                             with self._lock:
                                 if command_id in self._commands:
@@ -8,6 +8,7 @@ from typing import Optional, Dict, Any, List, Callable
 from .datastructures import CommandStatus, RunningCommand, ErrorInfo, ErrorCategory
 from .logging_manager import RateLimitedLogger, get_logger, get_context_logger, LogLevel
 from .error_handler import ErrorHandler, ProgressReporter
+from .validation import validate_command
 
 
 class EnhancedCommandExecutor:
@@ -41,7 +42,7 @@ class EnhancedCommandExecutor:
         
         try:
             # Validate command
-            is_valid, error_msg = self.session_manager._command_validator.validate_command(command)
+            is_valid, error_msg = validate_command(command)
             if not is_valid:
                 self.context_logger.log_operation_end("execute_enhanced", success=False,
                                                 details=f"Invalid command: {error_msg}")
@@ -1100,10 +1100,10 @@ class SSHSessionManager:
 
             while time.time() - start_time < timeout:
                 if shell.recv_ready():
-                    chunk = shell.recv(4096).decode("utf-8", errors="ignore")
+                    data, should_continue = output_limiter.add_bytes(shell.recv(4096))
                     last_recv_time = time.time()
                     idle_check_count = 0  # Reset idle check counter on new data
-                    limited_chunk, should_continue = output_limiter.add_chunk(chunk)
+                    limited_chunk = data.decode("utf-8", errors="ignore")
                     raw_output += limited_chunk
 
                     # Check for password prompt
@@ -1435,9 +1435,9 @@ class SSHSessionManager:
 
             while time.time() - start_time < timeout:
                 if shell.recv_ready():
-                    chunk = shell.recv(4096).decode("utf-8", errors="ignore")
+                    data, should_continue = output_limiter.add_bytes(shell.recv(4096))
                     last_recv_time = time.time()
-                    limited_chunk, should_continue = output_limiter.add_chunk(chunk)
+                    limited_chunk = data.decode("utf-8", errors="ignore")
                     raw_output += limited_chunk
 
                     if not seen_command_echo and "\n" in raw_output:
@@ -1660,8 +1660,8 @@ class SSHSessionManager:
 
             while time.time() - start_time < timeout:
                 if shell.recv_ready():
-                    chunk = shell.recv(4096).decode("utf-8", errors="ignore")
-                    limited_chunk, should_continue = output_limiter.add_chunk(chunk)
+                    data, should_continue = output_limiter.add_bytes(shell.recv(4096))
+                    limited_chunk = data.decode("utf-8", errors="ignore")
                     raw_output += limited_chunk
                     last_output_time = time.time()
 
@@ -2,67 +2,579 @@
 import os
 import re
 import tempfile
-from typing import Optional, Tuple
+import time
+from bisect import bisect_right
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Pattern, Protocol, Sequence, Tuple
+
+# Google RE2 matches in linear time; used for the dangerous patterns, whose '.*'
+# runs backtrack quadratically under re on hostile input. Optional (extra "re2")
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+# Maximal runs of word characters, i.e. the spans a \b<word>\b pattern can match
+_WORD_RE = re.compile(r'\w+')
+
+# Characters with a special meaning outside a character class
+_RE_SPECIAL = frozenset(".^$*+?{}[]|()\\")
+
+# Characters re.IGNORECASE treats as equal to 'i' that RE2's case folding does not
+_RE2_LETTER_I = "[iIıİ]"
+
+# RE2 class bodies for re's Unicode \s (str.isspace) and \w (str.isalnum or '_';
+# exactly the L* and N* categories)
+_RE2_SPACE = r"\x{9}-\x{d}\x{1c}-\x{20}\x{85}\x{a0}\x{1680}\x{2000}-\x{200a}\x{2028}\x{2029}\x{202f}\x{205f}\x{3000}"
+_RE2_WORD = r"\pL\pN_"
+
+
+def _re2_not_prefix(words: List[str]) -> str:
+    """
+    Translate a trailing ``(?!word1|word2)`` into a consuming RE2 alternation.
+
+    Built from a trie of the words: at each node the text may end, continue
+    with a character that starts no word, or follow a branch that has not yet
+    completed a word.
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word.lower():
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node: dict) -> str:
+        children = sorted(char for char in node if char)
+        branches = [r"\z", "[^" + "".join(re.escape(char) for char in children) + "]"]
+        for char in children:
+            if "" not in node[char]:
+                branches.append(re.escape(char) + emit(node[char]))
+        return "(?:" + "|".join(branches) + ")"
+
+    return emit(trie)
+
+
+def _re2_source(pattern: str, multiline: bool = False) -> str:
+    """
+    Translate a case-insensitive ``re`` pattern into RE2 syntax with the same meaning.
+
+    RE2's ``\\s``, ``\\w`` and ``\\b`` are ASCII-only, its case folding does not
+    equate 'i' with 'ı'/'İ', its non-multiline ``$`` only matches at the very
+    end, and it has no lookaround. Those constructs are rewritten with explicit
+    Unicode classes; ``\\b`` becomes a consuming class, and a negative
+    lookahead of literal words at the end of the pattern becomes a consuming
+    "not one of these prefixes" alternation. Anything else that could behave
+    differently raises ValueError so the caller falls back to ``re``.
+    """
+    word = _RE2_WORD
+    out = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            escaped = pattern[i + 1]
+            i += 2
+            if escaped in "sS":
+                negate = "^" if escaped == "S" else ""
+                out.append(f"[{negate}{_RE2_SPACE}]")
+            elif escaped in "wW":
+                out.append(f"[{'^' if escaped == 'W' else ''}{word}]")
+            elif escaped == "b":
+                # \b before a word character: preceded by start or a non-word character;
+                # before any other literal: preceded by a word character
+                following = pattern[i:i + 1]
+                if following == "\\":
+                    following = pattern[i + 1:i + 2]
+                    if following.isalnum():
+                        raise ValueError(f"unsupported \\b before \\{following}")
+                elif not following or following in _RE_SPECIAL:
+                    raise ValueError("unsupported \\b position")
+                if following.isascii() and (following.isalnum() or following == "_"):
+                    out.append(f"(?:\\A|[^{word}])")
+                else:
+                    out.append(f"[{word}]")
+            elif escaped == "A":
+                out.append(r"\A")
+            elif escaped == "Z":
+                out.append(r"\z")
+            elif escaped.isalnum():
+                raise ValueError(f"unsupported escape \\{escaped}")
+            else:
+                out.append("\\" + escaped)
+        elif char == "[":
+            end = pattern.index("]", i + 2 if pattern[i + 1:i + 2] in ("]", "^") else i + 1)
+            body = pattern[i:end + 1]
+            if "\\" in body or "i" in body.lower() or not body.isascii():
+                raise ValueError(f"unsupported character class {body}")
+            out.append(body)
+            i = end + 1
+        elif pattern.startswith("(?P<", i):
+            end = pattern.index(">", i)
+            out.append(pattern[i:end + 1])
+            i = end + 1
+        elif pattern.startswith("(?:", i):
+            out.append("(?:")
+            i += 3
+        elif pattern.startswith("(?!", i):
+            end = pattern.index(")", i)
+            words = pattern[i + 3:end].split("|")
+            if end != len(pattern) - 1 or not all(
+                    w.isascii() and w.isalnum() and "i" not in w.lower() for w in words):
+                raise ValueError("only a trailing negative lookahead of literal words is supported")
+            out.append(_re2_not_prefix(words))
+            i = end + 1
+        elif pattern.startswith("(?", i):
+            raise ValueError("unsupported group")
+        elif char == "$":
+            out.append("$" if multiline else r"(?:\n?\z)")
+            i += 1
+        elif char in "iI":
+            out.append(_RE2_LETTER_I)
+            i += 1
+        elif not char.isascii():
+            raise ValueError("non-ASCII literal")
+        else:
+            out.append(char)
+            i += 1
+    return "".join(out)
+
+
+class _Re2Pattern:
+    """
+    An RE2 regex with an equivalent ``re`` regex for text RE2 cannot take.
+
+    RE2 works on UTF-8, so strings containing lone surrogates (which can
+    arrive through JSON escapes) are matched with ``re`` instead.
+    """
+
+    __slots__ = ("_re2", "_re")
+
+    def __init__(self, re2_regex: Any, re_regex: Pattern[str]):
+        self._re2 = re2_regex
+        self._re = re_regex
+
+    def search(self, text: str) -> Any:
+        try:
+            return self._re2.search(text)
+        except UnicodeEncodeError:
+            return self._re.search(text)
+
+    def finditer(self, text: str) -> List[Any]:
+        try:
+            return list(self._re2.finditer(text))
+        except UnicodeEncodeError:
+            return list(self._re.finditer(text))
+
+
+def _fuse_patterns(patterns: Sequence[str], flags: str = "", use_re2: bool = False) -> Optional[Any]:
+    """
+    Compile a list of patterns into a single case-insensitive alternation.
+
+    Each pattern is wrapped in a named group ``g<index>`` so the pattern that
+    matched can be recovered from ``match.lastgroup``. With use_re2 and RE2
+    installed, the patterns are translated with _re2_source() and compiled
+    with RE2; if a pattern cannot be translated, ``re`` is used.
+
+    Args:
+        patterns: Regex patterns
+        flags: Extra inline flag letters, e.g. "m" for MULTILINE
+        use_re2: Whether to compile with RE2 when it is available
+
+    Returns:
+        The compiled regex, or None if there are no patterns
+    """
+    if not patterns:
+        return None
+    regex = re.compile(
+        f"(?i{flags})" + "|".join(f"(?P<g{i}>{p})" for i, p in enumerate(patterns)))
+    if use_re2 and re2 is not None:
+        try:
+            multiline = "m" in flags
+            source = f"(?i{flags})" + "|".join(
+                f"(?P<g{i}>{_re2_source(p, multiline)})" for i, p in enumerate(patterns))
+            return _Re2Pattern(re2.compile(source), regex)
+        except Exception:
+            pass
+    return regex
+
+
+# Case-insensitive full-match regex (and its keyword order) per keyword set
+_KEYWORD_RES: Dict[FrozenSet[str], Tuple[Pattern[str], List[str]]] = {}
+
+
+def _keyword_of(word: str, keywords: FrozenSet[str]) -> Optional[str]:
+    """
+    Return the keyword that word equals under re.IGNORECASE, or None.
+
+    ASCII words are lowercased and looked up in the set. re.IGNORECASE also
+    equates some non-ASCII letters with ASCII ones (e.g. 'ſ' with 's', the
+    Kelvin sign with 'k'), which neither str.lower() nor str.casefold()
+    reproduces exactly, so non-ASCII words are checked with the regex engine.
+    """
+    if word.isascii():
+        word = word.lower()
+        return word if word in keywords else None
+
+    entry = _KEYWORD_RES.get(keywords)
+    if entry is None:
+        ordered = sorted(keywords)
+        regex = re.compile(
+            "|".join(f"(?P<k{i}>{re.escape(k)})" for i, k in enumerate(ordered)),
+            re.IGNORECASE,
+        )
+        entry = _KEYWORD_RES[keywords] = (regex, ordered)
+    regex, ordered = entry
+    match = regex.fullmatch(word)
+    return ordered[int(match.lastgroup[1:])] if match else None
+
+
+def _keyword_finder(keyword_sets: Sequence[FrozenSet[str]]) -> Callable[[str], List[Optional[str]]]:
+    """
+    Return a function that scans a command once for the keywords of several sets.
+
+    The function returns, per set, the first whole word of the command that is
+    one of its keywords, as the equivalent word-boundary pattern (e.g.
+    ``\\bnohup\\b``) for error messages. Earlier sets take precedence, so
+    the scan stops at the first keyword of the first set.
+    """
+    keywords = frozenset().union(*keyword_sets)
+    set_of: Dict[str, int] = {}
+    for index, keyword_set in enumerate(keyword_sets):
+        for keyword in keyword_set:
+            set_of.setdefault(keyword, index)
+    # re.IGNORECASE folds one character at a time, so only words as long as some
+    # keyword can match; the regex skips all others without a Python round trip
+    lengths = [len(keyword) for keyword in keywords]
+    words = re.compile(rf"(?<!\w)\w{{{min(lengths)},{max(lengths)}}}(?!\w)")
+
+    def find_keywords(command: str) -> List[Optional[str]]:
+        hits: List[Optional[str]] = [None] * len(keyword_sets)
+        for word in words.finditer(command):
+            keyword = _keyword_of(word.group(), keywords)
+            if keyword is not None:
+                index = set_of[keyword]
+                if hits[index] is None:
+                    hits[index] = rf"\b{keyword}\b"
+                    if index == 0:
+                        break
+        return hits
+
+    return find_keywords
+
+
+# Patterns that indicate streaming/indefinite commands
+STREAMING_PATTERNS = ()
+
+# Patterns for background processes
+BACKGROUND_PATTERNS = (
+    r'&\s*$',  # Command ending with &
+)
+
+# Whole-word keywords for background processes (lowercase)
+BACKGROUND_KEYWORDS = frozenset({'nohup', 'disown', 'screen', 'tmux'})
+
+# Potentially dangerous commands (optional - only checked with check_dangerous)
+DANGEROUS_PATTERNS = (
+    r'\brm\s+.*-rf\s+/(?!home|tmp)',  # rm -rf on root paths
+    r'\bdd\s+.*of=/dev/',  # dd to device files
+    r'\b:\(\)\{.*:\|:.*\};:',  # fork bomb
+)
+
+# Whole-word keywords for dangerous commands (lowercase)
+DANGEROUS_KEYWORDS = frozenset({'mkfs', 'format'})
+
+# (name, patterns, keywords, error message, only checked with check_dangerous)
+_VALIDATION_CATEGORIES = (
+    ("streaming", STREAMING_PATTERNS, frozenset(),
+     "Streaming/interactive command blocked: Matches pattern '{}'. Use finite operations (e.g., 'tail -n 100' instead of 'tail -f').",
+     False),
+    ("background", BACKGROUND_PATTERNS, BACKGROUND_KEYWORDS,
+     "Background process blocked: Matches pattern '{}'. Background processes are not allowed.",
+     False),
+    ("dangerous", DANGEROUS_PATTERNS, DANGEROUS_KEYWORDS,
+     "Dangerous command blocked: Matches pattern '{}'. This operation is not allowed for safety.",
+     True),
+)
+
+# Categories matched with RE2 when it is installed. For short commands the RE2
+# wrapper (and the UTF-8 encode it does) costs more than it saves, so only the
+# patterns that can backtrack badly under re use it.
+_RE2_CATEGORIES = frozenset({"dangerous"})
+
+class _CommandValidatorFunc(Protocol):
+    """Signature of the generated validate_command(), for type checkers."""
+
+    def __call__(self, command: str, check_dangerous: bool = False) -> Tuple[bool, Optional[str]]: ...
+
+
+_VALIDATE_COMMAND_DOC = """
+    Validate a command for safety.
+
+    Args:
+        command: The command to validate
+        check_dangerous: Whether to check for dangerous patterns
+
+    Returns:
+        Tuple of (is_valid: bool, error_message: Optional[str])
+    """
+
+
+def _build_validator() -> _CommandValidatorFunc:
+    """
+    Generate validate_command() specialised to _VALIDATION_CATEGORIES.
+
+    The pattern sets are fixed at import time, so the checks are emitted as
+    straight-line code: empty categories are left out, each category's fused
+    regex and message are bound as globals of the generated function, and all
+    keyword categories share one word scan. A call then runs no loop over categories and no attribute lookups
+    besides the regex search itself.
+    """
+    namespace: Dict[str, Any] = {}
+    # Keyword categories share one word scan; optional ones must come last so the
+    # scan without check_dangerous is a prefix of the full one
+    keyword_categories = [(name, keywords, optional) for name, _, keywords, _, optional
+                          in _VALIDATION_CATEGORIES if keywords]
+    optionals = [optional for _, _, optional in keyword_categories]
+    if optionals != sorted(optionals):
+        raise ValueError("optional keyword categories must follow the required ones")
+    keyword_names = [name for name, _, _ in keyword_categories]
+    keyword_sets = [keywords for _, keywords, _ in keyword_categories]
+    required_sets = keyword_sets[:optionals.count(False)]
+    namespace["_find_all_keywords"] = _keyword_finder(keyword_sets) if keyword_sets else None
+    namespace["_find_required_keywords"] = _keyword_finder(required_sets) if required_sets else None
+    scanned = False
+
+    lines = ["def validate_command(command: str, check_dangerous: bool = False):"]
+    for name, patterns, keywords, message, optional in _VALIDATION_CATEGORIES:
+        regex = _fuse_patterns(patterns, use_re2=name in _RE2_CATEGORIES)
+        if regex is None and not keywords:
+            continue
+        indent = "    "
+        if optional:
+            lines.append("    if check_dangerous:")
+            indent = "        "
+        namespace[f"_{name}_message"] = message
+        if regex is not None:
+            namespace[f"_{name}_re"] = regex
+            namespace[f"_{name}_patterns"] = patterns
+            lines += [
+                f"{indent}match = _{name}_re.search(command)",
+                f"{indent}if match:",
+                f"{indent}    return False, _{name}_message.format(_{name}_patterns[int(match.lastgroup[1:])])",
+            ]
+        if keywords:
+            if not scanned:
+                # Scan where the first keyword check happens, so earlier regex hits skip it
+                if not optional:
+                    lines.append(f"{indent}keyword_hits = (_find_all_keywords(command) if check_dangerous"
+                                 " else _find_required_keywords(command))")
+                else:
+                    lines.append(f"{indent}keyword_hits = _find_all_keywords(command)")
+                scanned = True
+            index = keyword_names.index(name)
+            lines += [
+                f"{indent}if keyword_hits[{index}]:",
+                f"{indent}    return False, _{name}_message.format(keyword_hits[{index}])",
+            ]
+    lines.append("    return True, None")
+
+    exec(compile("\n".join(lines), "<validate_command>", "exec"), namespace)
+    validator = namespace["validate_command"]
+    validator.__doc__ = _VALIDATE_COMMAND_DOC
+    validator.__module__ = __name__
+    return validator
+
+
+validate_command: _CommandValidatorFunc = _build_validator()
+
+
+# Batch variants over newline-joined commands: MULTILINE makes '$' match at the end
+# of each command, and '.' never crosses the separator, so any command with a real
+# match also yields a batch match touching it (batch hits are then re-checked).
+# The RE2 translations of \b and a trailing lookahead consume one character on
+# either side of a match, so the separator is two newlines: a match ending on the
+# first one still leaves the second as the boundary for the next command.
+_BATCH_SEPARATOR = "\n\n"
+# Compiled per category, like the single-command regexes, so both use the same engine
+_BATCH_RES = tuple(regex for regex in (
+    _fuse_patterns(STREAMING_PATTERNS, "m"),
+    _fuse_patterns(BACKGROUND_PATTERNS, "m"),
+) if regex is not None)
+_BATCH_DANGEROUS_RE = _fuse_patterns(DANGEROUS_PATTERNS, "m", use_re2=True)
+
+
+def validate_commands(commands: Sequence[str],
+                      check_dangerous: bool = False) -> List[Tuple[bool, Optional[str]]]:
+    """
+    Validate many commands with one regex scan per pattern category.
+
+    The commands are joined and scanned together; only commands touched by a match
+    are re-checked with validate_command(), so the results are identical to
+    calling validate_command() on each command.
+
+    Args:
+        commands: The commands to validate
+        check_dangerous: Whether to check for dangerous patterns
+
+    Returns:
+        List of (is_valid: bool, error_message: Optional[str]), one per command
+    """
+    results: List[Tuple[bool, Optional[str]]] = [(True, None)] * len(commands)
+    if not commands:
+        return results
+
+    starts = []
+    offset = 0
+    for command in commands:
+        starts.append(offset)
+        offset += len(command) + len(_BATCH_SEPARATOR)
+    joined = _BATCH_SEPARATOR.join(commands)
+
+    # A match may run across the separator, so flag every command it touches
+    candidates = set()
+    batch_res = _BATCH_RES + (_BATCH_DANGEROUS_RE,) if check_dangerous else _BATCH_RES
+    for batch_re in batch_res:
+        for match in batch_re.finditer(joined):
+            first = bisect_right(starts, match.start()) - 1
+            last = bisect_right(starts, max(match.start(), match.end() - 1)) - 1
+            candidates.update(range(first, last + 1))
+
+    # Words never contain the separator, so each belongs to a single command
+    keywords = BACKGROUND_KEYWORDS | DANGEROUS_KEYWORDS if check_dangerous else BACKGROUND_KEYWORDS
+    for word in _WORD_RE.finditer(joined):
+        if _keyword_of(word.group(), keywords):
+            candidates.add(bisect_right(starts, word.start()) - 1)
+
+    for index in candidates:
+        results[index] = validate_command(commands[index], check_dangerous)
+    return results
 
 
 class CommandValidator:
-    """Validates commands for safety before execution."""
+    """Validates commands for safety before execution.
+
+    Kept for backwards compatibility; new code should call validate_command().
+    The pattern and keyword attributes are read-only references to the module
+    constants: validate_command() is generated from those at import time, so
+    reassigning or extending them here does not change validation.
+    """
 
     # Maximum output size in bytes (10MB)
     MAX_OUTPUT_SIZE = 10 * 1024 * 1024
 
-    # Patterns that indicate streaming/indefinite commands
-    STREAMING_PATTERNS = []
-
-    # Patterns for background processes
-    BACKGROUND_PATTERNS = [
-        r'&\s*$',  # Command ending with &
-        r'\bnohup\b',
-        r'\bdisown\b',
-        r'\bscreen\b',
-        r'\btmux\b',
-    ]
-
-    # Potentially dangerous commands (optional - can be enabled/disabled)
-    DANGEROUS_PATTERNS = [
-        r'\brm\s+.*-rf\s+/(?!home|tmp)',  # rm -rf on root paths
-        r'\bdd\s+.*of=/dev/',  # dd to device files
-        r'\b:\(\)\{.*:\|:.*\};:',  # fork bomb
-        r'\bmkfs\b',
-        r'\bformat\b',
-    ]
-
-    @classmethod
-    def validate_command(cls, command: str, check_dangerous: bool = False) -> Tuple[bool, Optional[str]]:
-        """
-        Validate a command for safety.
+    STREAMING_PATTERNS = STREAMING_PATTERNS
+    BACKGROUND_PATTERNS = BACKGROUND_PATTERNS
+    BACKGROUND_KEYWORDS = BACKGROUND_KEYWORDS
+    DANGEROUS_PATTERNS = DANGEROUS_PATTERNS
+    DANGEROUS_KEYWORDS = DANGEROUS_KEYWORDS
 
-        Args:
-            command: The command to validate
-            check_dangerous: Whether to check for dangerous patterns
+    @staticmethod
+    def validate_command(command: str, check_dangerous: bool = False) -> Tuple[bool, Optional[str]]:
+        """Validate a command for safety. See validate_command()."""
+        return validate_command(command, check_dangerous)
 
-        Returns:
-            Tuple of (is_valid: bool, error_message: Optional[str])
-        """
-        command_lower = command.lower().strip()
 
-        # Check for streaming patterns
-        for pattern in cls.STREAMING_PATTERNS:
-            if re.search(pattern, command, re.IGNORECASE):
-                return False, f"Streaming/interactive command blocked: Matches pattern '{pattern}'. Use finite operations (e.g., 'tail -n 100' instead of 'tail -f')."
+# Per-host paranoia setting, read from the environment on first use
+_PARANOIA_CACHE: Dict[str, bool] = {}
+
 
-        # Check for background processes
-        for pattern in cls.BACKGROUND_PATTERNS:
-            if re.search(pattern, command, re.IGNORECASE):
-                return False, f"Background process blocked: Matches pattern '{pattern}'. Background processes are not allowed."
+def _paranoia_enabled(host: str) -> bool:
+    """Return whether {host}_PARANOIA=1, caching the answer per host."""
+    enabled = _PARANOIA_CACHE.get(host)
+    if enabled is None:
+        enabled = os.environ.get(f"{host}_PARANOIA") == "1"
+        _PARANOIA_CACHE[host] = enabled
+    return enabled
 
-        # Check for dangerous commands (optional)
-        if check_dangerous:
-            for pattern in cls.DANGEROUS_PATTERNS:
-                if re.search(pattern, command, re.IGNORECASE):
-                    return False, f"Dangerous command blocked: Matches pattern '{pattern}'. This operation is not allowed for safety."
 
-        return True, None
+# Folder an external helper watches for permission status files
+_PERMISSION_DIR = os.path.join(tempfile.gettempdir(), "mcp-ssh-permissions")
+
+# (directory mtime, latest file path) from the last scan of _PERMISSION_DIR
+_permission_file_cache: Optional[Tuple[int, Optional[str]]] = None
+
+# A folder mtime this close to now may not yet reflect every change made within
+# the same timestamp tick, so scans taken then are not cached ("racy timestamp")
+_RACY_MTIME_NS = 2_000_000_000
+
+
+def _latest_permission_file() -> Optional[str]:
+    """
+    Return the most recently modified file in the permission folder.
+
+    The result is cached and reused until the folder's own mtime changes,
+    i.e. until a file is added, removed or renamed. A scan is only cached once
+    the folder mtime is older than the filesystem timestamp granularity, so a
+    file created in the same tick as the scan is never missed.
+    """
+    global _permission_file_cache
+    try:
+        dir_mtime = os.stat(_PERMISSION_DIR).st_mtime_ns
+    except OSError:
+        return None
+
+    if _permission_file_cache is not None and _permission_file_cache[0] == dir_mtime:
+        return _permission_file_cache[1]
+
+    # is_file() comes from the directory listing, so only stat() costs a syscall
+    with os.scandir(_PERMISSION_DIR) as entries:
+        latest = max(
+            (entry for entry in entries if entry.is_file()),
+            key=lambda entry: entry.stat().st_mtime,
+            default=None,
+        )
+    permission_file = latest.path if latest else None
+    if time.time_ns() - dir_mtime >= _RACY_MTIME_NS:
+        _permission_file_cache = (dir_mtime, permission_file)
+    else:
+        _permission_file_cache = None
+    return permission_file
+
+
+# Status markers written to the permission file
+_STATUS_WAITING = b"waiting"
+_STATUS_APPROVED = b"approved"
+_STATUS_DENIED = b"denied"
+
+
+def _write_status(path: str, status: bytes) -> None:
+    """Overwrite a permission file with a status marker using raw fd I/O."""
+    fd = os.open(path, os.O_WRONLY | os.O_TRUNC | os.O_CREAT, 0o600)
+    try:
+        os.write(fd, status)
+    finally:
+        os.close(fd)
+
+
+# (preferred, fallback) xdialog okcancel functions, imported on first use
+_dialog_backends: Optional[Tuple[Callable[..., int], Callable[..., int]]] = None
+
+
+def _ask_okcancel(title: str, message: str) -> int:
+    """
+    Show an OK/Cancel dialog, returning 0 for OK and 1 for Cancel.
+
+    Uses the zenity backend if available, otherwise the xdialog default. Only
+    the imports are cached: zenity is tried again on every dialog, and the
+    xdialog default is used for any dialog where it fails.
+    """
+    global _dialog_backends
+    if _dialog_backends is None:
+        import xdialog
+        try:
+            from xdialog.zenity_dialogs import okcancel as preferred
+        except Exception:
+            preferred = xdialog.okcancel
+        _dialog_backends = (preferred, xdialog.okcancel)
+
+    preferred, fallback = _dialog_backends
+    try:
+        return preferred(title=title, message=message)
+    except Exception:
+        # Fallback to xdialog default
+        if preferred is fallback:
+            raise
+        return fallback(title=title, message=message)
 
 
 def check_permission(host: str, title: str, message: str) -> bool | str:
@@ -70,6 +582,7 @@ def check_permission(host: str, title: str, message: str) -> bool | str:
     Ask for user permission using xdialog (cross-platform native dialogs).
 
     Paranoia mode is controlled per-host via env var: {host}_PARANOIA=1
+    (read once per host and cached for the life of the process)
 
     Args:
         host: SSH host/alias for paranoia mode check
@@ -80,50 +593,32 @@ def check_permission(host: str, title: str, message: str) -> bool | str:
         bool | str: True if user approves or paranoia mode disabled, error message string if denied
     """
     # Find the latest permission file in the known folder
-    permission_dir = os.path.join(tempfile.gettempdir(), "mcp-ssh-permissions")
     permission_file = None
-    
-    if os.path.exists(permission_dir):
-        try:
-            # Get all files in the directory
-            files = [os.path.join(permission_dir, f) for f in os.listdir(permission_dir) 
-                     if os.path.isfile(os.path.join(permission_dir, f))]
-            if files:
-                # Find the most recently modified file
-                permission_file = max(files, key=os.path.getmtime)
-                # Write waiting status
-                with open(permission_file, 'w') as f:
-                    f.write("waiting")
-        except:
-            pass
+    try:
+        permission_file = _latest_permission_file()
+        if permission_file:
+            # Write waiting status
+            _write_status(permission_file, _STATUS_WAITING)
+    except:
+        pass
     
     # Check if paranoia mode is enabled for this host
-    if os.getenv(f"{host}_PARANOIA") != "1":
+    if not _paranoia_enabled(host):
         # Write approved status if permission file exists
         if permission_file:
             try:
-                with open(permission_file, 'w') as f:
-                    f.write("approved")
+                _write_status(permission_file, _STATUS_APPROVED)
             except:
                 pass
         return True
 
-    # Use zenity backend if available, otherwise fallback to default
-    try:
-        import xdialog.zenity_dialogs as zenity
-        result = zenity.okcancel(title=title, message=message)
-        approved = result == 0  # 0 = OK, 1 = Cancel
-    except Exception:
-        # Fallback to xdialog default
-        import xdialog
-        result = xdialog.okcancel(title=title, message=message)
-        approved = result == 0  # 0 = OK, 1 = Cancel
+    result = _ask_okcancel(title, message)
+    approved = result == 0  # 0 = OK, 1 = Cancel
 
     # Write final permission result if permission file exists
     if permission_file:
         try:
-            with open(permission_file, 'w') as f:
-                f.write("approved" if approved else "denied")
+            _write_status(permission_file, _STATUS_APPROVED if approved else _STATUS_DENIED)
         except:
             pass
 
@@ -149,8 +644,35 @@ def check_permission(host: str, title: str, message: str) -> bool | str:
     return approved
 
 
+def utf8_size(text: str) -> int:
+    """Return the UTF-8 encoded size of text, skipping the encode for ASCII."""
+    return len(text) if text.isascii() else len(text.encode('utf-8'))
+
+
+def _utf8_boundary(data: bytes, limit: int) -> int:
+    """
+    Return the largest offset <= limit that does not split a UTF-8 character.
+
+    Continuation bytes look like 0b10xxxxxx, so backing off over them lands on
+    the start of the character that would have been cut. A character has at most
+    three of them, so the back-off stops after three bytes; on invalid or binary
+    data the cut then simply stays within three bytes of the limit.
+    """
+    cut = limit
+    floor = max(0, limit - 3)
+    while floor < cut < len(data) and (data[cut] & 0xC0) == 0x80:
+        cut -= 1
+    return cut
+
+
 class OutputLimiter:
-    """Limits output size to prevent memory issues."""
+    """
+    Limits output size to prevent memory issues.
+
+    Limiting is memory-bound: the cost is dominated by touching the bytes of
+    each chunk. Callers reading raw bytes from an SSH channel should use
+    add_bytes() so the data is not decoded and re-encoded just to be measured.
+    """
 
     def __init__(self, max_size: int = CommandValidator.MAX_OUTPUT_SIZE):
         self.max_size = max_size
@@ -167,20 +689,61 @@ class OutputLimiter:
         Returns:
             Tuple of (chunk_to_add: str, should_continue: bool)
         """
-        chunk_size = len(chunk.encode('utf-8'))
+        # Once the limit is reached every further chunk is dropped; skip sizing it
+        if self.current_size >= self.max_size:
+            self.truncated = True
+            return "", False
+
+        # ASCII text is one byte per character, so skip the UTF-8 encode
+        encoded = None
+        if chunk.isascii():
+            chunk_size = len(chunk)
+        else:
+            encoded = chunk.encode('utf-8')
+            chunk_size = len(encoded)
 
         if self.current_size + chunk_size > self.max_size:
-            # Calculate how much we can still add
+            # Calculate how much we can still add (always > 0 after the check above)
             remaining = self.max_size - self.current_size
-            if remaining > 0:
-                # Truncate the chunk
-                truncated_chunk = chunk.encode('utf-8')[:remaining].decode('utf-8', errors='ignore')
-                self.current_size = self.max_size
-                self.truncated = True
-                truncation_msg = f"\n\n[OUTPUT TRUNCATED: Maximum output size of {self.max_size} bytes exceeded]"
-                return truncated_chunk + truncation_msg, False
+            # Truncate the chunk
+            if encoded is None:
+                truncated_chunk = chunk[:remaining]
             else:
-                return "", False
+                cut = _utf8_boundary(encoded, remaining)
+                truncated_chunk = encoded[:cut].decode('utf-8')
+            self.current_size = self.max_size
+            self.truncated = True
+            return truncated_chunk + self._truncation_message(), False
 
         self.current_size += chunk_size
-        return chunk, True
\ No newline at end of file
+        return chunk, True
+
+    def add_bytes(self, data: bytes) -> Tuple[bytes, bool]:
+        """
+        Add a chunk of raw output bytes, enforcing size limits.
+
+        Same semantics as add_chunk(), but sized with len() and truncated by
+        slicing, without any decoding. A truncated chunk is cut on a UTF-8
+        character boundary.
+
+        Args:
+            data: The chunk of output to add, as received from the channel
+
+        Returns:
+            Tuple of (data_to_add: bytes, should_continue: bool)
+        """
+        if self.current_size >= self.max_size:
+            self.truncated = True
+            return b"", False
+
+        if self.current_size + len(data) > self.max_size:
+            cut = _utf8_boundary(data, self.max_size - self.current_size)
+            self.current_size = self.max_size
+            self.truncated = True
+            return data[:cut] + self._truncation_message().encode('utf-8'), False
+
+        self.current_size += len(data)
+        return data, True
+
+    def _truncation_message(self) -> str:
+        return f"\n\n[OUTPUT TRUNCATED: Maximum output size of {self.max_size} bytes exceeded]"
@@ -0,0 +1,287 @@
+"""Tests for command validation and output limiting."""
+
+import os
+import random
+import re
+import time
+import unicodedata
+
+import pytest
+
+from mcp_ssh_session import validation
+from mcp_ssh_session.validation import CommandValidator, OutputLimiter, validate_command, validate_commands
+
+
+class TestCommandValidator:
+    """Test CommandValidator pattern matching."""
+
+    def test_allows_normal_commands(self):
+        """Ordinary commands pass validation."""
+        for command in ["ls -la", "tail -n 100 /var/log/syslog", "echo a && echo b"]:
+            assert CommandValidator.validate_command(command) == (True, None)
+
+    def test_blocks_background_commands(self):
+        """Background and detaching commands are rejected."""
+        for command in ["sleep 10 &", "sleep 10 &  ", "nohup ./run.sh", "NOHUP ./run.sh",
+                        "tmux new -s x", "screen -S x", "./run.sh; disown"]:
+            is_valid, error = CommandValidator.validate_command(command)
+            assert not is_valid, command
+            assert error.startswith("Background process blocked")
+
+    def test_background_keywords_need_word_boundaries(self):
+        """Keywords embedded in longer words are not matched."""
+        for command in ["cat screenshot.png", "ls tmuxinator", "echo a && echo b"]:
+            assert CommandValidator.validate_command(command)[0], command
+
+    def test_keywords_match_like_ignorecase_regex(self):
+        """Keyword matching agrees with the equivalent \\b<word>\\b IGNORECASE regex."""
+        variants = ["screen", "SCREEN", "ſcreen", "dıSown", "dİsown", "mKfs",
+                    "ﬀormat", "nohupé", "énohup", "tmux_", "tmux-1"]
+        for variant in variants:
+            command = f"{variant} -x"
+            expected = not any(
+                re.search(rf"\b{keyword}\b", command, re.IGNORECASE)
+                for keyword in validation.BACKGROUND_KEYWORDS | validation.DANGEROUS_KEYWORDS
+            )
+            assert validate_command(command, check_dangerous=True)[0] == expected, variant
+            assert validate_commands([command], check_dangerous=True)[0][0] == expected, variant
+
+    def test_keyword_precedence(self):
+        """Background keywords win over dangerous ones wherever they appear."""
+        _, error = validate_command("mkfs /dev/sdb1; nohup x", check_dangerous=True)
+        assert r"'\bnohup\b'" in error
+        _, error = validate_command("format c; mkfs x", check_dangerous=True)
+        assert r"'\bformat\b'" in error
+        _, error = validate_command("dd if=/x of=/dev/sda; mkfs x", check_dangerous=True)
+        assert "dd" in error
+
+    def test_dangerous_only_when_requested(self):
+        """Dangerous patterns are only enforced with check_dangerous."""
+        for command in ["rm -rf /etc", "dd if=/dev/zero of=/dev/sda", "mkfs.ext4 /dev/sdb1"]:
+            assert CommandValidator.validate_command(command)[0], command
+            is_valid, error = CommandValidator.validate_command(command, check_dangerous=True)
+            assert not is_valid, command
+
+        assert CommandValidator.validate_command("rm -rf /tmp/build", check_dangerous=True)[0]
+        assert CommandValidator.validate_command("rm -rf /home/user/x", check_dangerous=True)[0]
+        assert CommandValidator.validate_command("clang-formatter x.c", check_dangerous=True)[0]
+
+    def test_error_message_quotes_pattern(self):
+        """The error message names the pattern that matched."""
+        _, error = CommandValidator.validate_command("nohup ./run.sh")
+        assert r"'\bnohup\b'" in error
+        _, error = CommandValidator.validate_command("sleep 1 &")
+        assert r"'&\s*$'" in error
+
+    def test_module_function_matches_class_shim(self):
+        """CommandValidator.validate_command forwards to validate_command."""
+        for command in ["ls", "nohup x", "rm -rf /etc", "sleep 1 &"]:
+            for check_dangerous in (False, True):
+                assert (CommandValidator.validate_command(command, check_dangerous)
+                        == validate_command(command, check_dangerous))
+
+    def test_batch_matches_single_validation(self):
+        """validate_commands gives the same result as validating one at a time."""
+        commands = ["ls", "sleep 1 &", "echo rm", "-rf /etc", "nohup x", "",
+                    "cat a &\nls", "mkfs.ext4 /dev/sdb1", "echo done &\n"]
+        for check_dangerous in (False, True):
+            assert validate_commands(commands, check_dangerous) == [
+                validate_command(command, check_dangerous) for command in commands
+            ]
+        assert validate_commands([]) == []
+
+    def test_unicode_whitespace_counts_as_whitespace(self):
+        """\\s keeps re's Unicode meaning whichever regex engine is in use."""
+        for command in ["sleep 100 &\v", "sleep 100 &\xa0", "sleep 100 &\u2003"]:
+            assert not validate_command(command)[0], repr(command)
+        assert not validate_command("rm\u2003-rf /etc", check_dangerous=True)[0]
+
+    def test_lone_surrogates_are_validated(self):
+        """Strings that are not valid UTF-8 are still checked."""
+        assert not validate_command("\ud800 sleep 1 &")[0]
+        assert validate_commands(["\ud800", "nohup x"]) == [
+            (True, None), validate_command("nohup x")]
+
+
+class TestRe2Translation:
+    """Test that RE2-compiled patterns keep re semantics."""
+
+    def setup_method(self):
+        self.re2 = pytest.importorskip("re2")
+
+    def test_all_patterns_compile_with_re2(self):
+        """Every built-in pattern can be translated rather than left to re."""
+        for patterns in (validation.BACKGROUND_PATTERNS, validation.DANGEROUS_PATTERNS):
+            for flags in ("", "m"):
+                regex = validation._fuse_patterns(patterns, flags, use_re2=True)
+                assert isinstance(regex, validation._Re2Pattern)
+
+    def test_only_dangerous_patterns_use_re2(self):
+        """The cheap background check stays on re; the dangerous one uses RE2."""
+        assert isinstance(validation._fuse_patterns(validation.BACKGROUND_PATTERNS), re.Pattern)
+        assert isinstance(validation._BATCH_DANGEROUS_RE, validation._Re2Pattern)
+        assert all(isinstance(regex, re.Pattern) for regex in validation._BATCH_RES)
+
+    def test_character_classes_match_re(self):
+        """The \\s and \\w classes agree with re on every character Python knows."""
+        space = self.re2.compile(f"[{validation._RE2_SPACE}]")
+        word = self.re2.compile(f"[{validation._RE2_WORD}]")
+        for code in range(0x20000):
+            char = chr(code)
+            # Surrogates cannot reach RE2; RE2 may know newer characters than unicodedata
+            if unicodedata.category(char) in ("Cs", "Cn"):
+                continue
+            assert bool(space.fullmatch(char)) == char.isspace(), hex(code)
+            assert bool(word.fullmatch(char)) == bool(re.fullmatch(r"\w", char)), hex(code)
+
+    def test_patterns_match_like_re(self):
+        """Translated patterns find a match exactly when the originals do."""
+        alphabet = ["rm", "dd", "-rf", " ", "\n", "\v", "\xa0", "/", "home", "tmp", "/hom",
+                    "of=/dev/", "&", "é", "ı", "İ", "RM", ":(){", ":|:", "};:", "x"]
+        rng = random.Random(0)
+        for pattern in validation.BACKGROUND_PATTERNS + validation.DANGEROUS_PATTERNS:
+            for multiline in (False, True):
+                flags = "(?im)" if multiline else "(?i)"
+                expected = re.compile(flags + pattern)
+                actual = self.re2.compile(flags + validation._re2_source(pattern, multiline))
+                for _ in range(3000):
+                    text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 6)))
+                    assert bool(actual.search(text)) == bool(expected.search(text)), (pattern, text)
+
+
+class TestOutputLimiter:
+    """Test OutputLimiter size enforcement."""
+
+    def test_passes_chunks_under_limit(self):
+        limiter = OutputLimiter(max_size=10)
+        assert limiter.add_chunk("hello") == ("hello", True)
+        assert limiter.current_size == 5
+        assert not limiter.truncated
+
+    def test_truncates_at_limit(self):
+        limiter = OutputLimiter(max_size=8)
+        limiter.add_chunk("hello")
+        chunk, should_continue = limiter.add_chunk("world")
+        assert not should_continue
+        assert chunk.startswith("wor")
+        assert "OUTPUT TRUNCATED" in chunk
+        assert limiter.truncated
+        assert limiter.add_chunk("more") == ("", False)
+
+    def test_counts_utf8_bytes(self):
+        limiter = OutputLimiter(max_size=5)
+        # "é" is two bytes in UTF-8; cutting mid-character must not leak a partial byte
+        chunk, should_continue = limiter.add_chunk("ééé")
+        assert not should_continue
+        assert chunk.startswith("éé\n")
+
+    def test_truncates_on_character_boundary(self):
+        text = "aé€😀b"
+        for max_size in range(1, len(text.encode("utf-8"))):
+            limiter = OutputLimiter(max_size=max_size)
+            chunk, _ = limiter.add_chunk(text)
+            kept = chunk.split("\n\n[OUTPUT TRUNCATED")[0]
+            assert text.startswith(kept)
+            assert len(kept.encode("utf-8")) <= max_size
+
+    def test_drops_chunks_once_full(self):
+        limiter = OutputLimiter(max_size=4)
+        assert limiter.add_chunk("abcd") == ("abcd", True)
+        assert limiter.add_chunk("é" * 1000) == ("", False)
+        assert limiter.truncated
+
+    def test_utf8_size(self):
+        assert validation.utf8_size("") == 0
+        assert validation.utf8_size("abc") == 3
+        assert validation.utf8_size("aé€😀") == 10
+
+    def test_add_bytes(self):
+        limiter = OutputLimiter(max_size=6)
+        assert limiter.add_bytes(b"abc") == (b"abc", True)
+        data, should_continue = limiter.add_bytes("é€".encode("utf-8"))
+        assert not should_continue
+        # Only "é" fits; the 3-byte "€" must not be split
+        assert data.startswith("é".encode("utf-8") + b"\n\n[OUTPUT TRUNCATED")
+        assert limiter.add_bytes(b"more") == (b"", False)
+
+    def test_add_bytes_invalid_utf8(self):
+        limiter = OutputLimiter(max_size=50)
+        data, should_continue = limiter.add_bytes(b"a" + b"\x80" * 100)
+        assert not should_continue
+        assert data.startswith(b"a" + b"\x80" * 46)
+
+        binary = bytes(range(256))
+        limiter = OutputLimiter(max_size=100)
+        data, _ = limiter.add_bytes(binary)
+        kept = data.split(b"\n\n[OUTPUT TRUNCATED")[0]
+        assert binary.startswith(kept)
+        assert 97 <= len(kept) <= 100
+
+
+class TestParanoiaMode:
+    """Test the per-host paranoia setting."""
+
+    def test_paranoia_setting_is_cached_per_host(self, monkeypatch):
+        monkeypatch.setattr(validation, "_PARANOIA_CACHE", {})
+        monkeypatch.setenv("cachedhost_PARANOIA", "1")
+        assert validation._paranoia_enabled("cachedhost")
+        assert not validation._paranoia_enabled("otherhost")
+
+        monkeypatch.delenv("cachedhost_PARANOIA")
+        assert validation._paranoia_enabled("cachedhost")
+
+    def test_permission_granted_without_paranoia(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(validation, "_PERMISSION_DIR", str(tmp_path))
+        monkeypatch.setattr(validation, "_permission_file_cache", None)
+        monkeypatch.setattr(validation, "_PARANOIA_CACHE", {})
+        monkeypatch.delenv("plainhost_PARANOIA", raising=False)
+        assert validation.check_permission("plainhost", "title", "message") is True
+
+    def test_latest_permission_file(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(validation, "_PERMISSION_DIR", str(tmp_path))
+        monkeypatch.setattr(validation, "_permission_file_cache", None)
+        assert validation._latest_permission_file() is None
+
+        older, newer = tmp_path / "older", tmp_path / "newer"
+        older.write_text("")
+        newer.write_text("")
+        os.utime(older, (1, 1))
+        assert validation._latest_permission_file() == str(newer)
+
+        monkeypatch.setattr(validation, "_PARANOIA_CACHE", {"plainhost": False})
+        assert validation.check_permission("plainhost", "title", "message") is True
+        assert newer.read_text() == "approved"
+
+    def test_permission_file_cache_skips_racy_mtime(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(validation, "_PERMISSION_DIR", str(tmp_path))
+        monkeypatch.setattr(validation, "_permission_file_cache", None)
+
+        # A folder mtime well in the past is trusted: the scan is cached
+        old_ns = time.time_ns() - 10 * validation._RACY_MTIME_NS
+        os.utime(tmp_path, ns=(old_ns, old_ns))
+        assert validation._latest_permission_file() is None
+        (tmp_path / "hidden").write_text("")
+        os.utime(tmp_path, ns=(old_ns, old_ns))
+        assert validation._latest_permission_file() is None
+
+        # A recent folder mtime is not: a file created in the same tick is found
+        recent_ns = time.time_ns()
+        os.utime(tmp_path, ns=(recent_ns, recent_ns))
+        assert validation._latest_permission_file() == str(tmp_path / "hidden")
+        (tmp_path / "same_tick").write_text("")
+        os.utime(tmp_path / "hidden", (1, 1))
+        os.utime(tmp_path, ns=(recent_ns, recent_ns))
+        assert validation._latest_permission_file() == str(tmp_path / "same_tick")
+
+    def test_dialog_falls_back_to_xdialog_default(self, monkeypatch):
+        calls = []
+
+        def broken_okcancel(**kwargs):
+            calls.append("zenity")
+            raise RuntimeError("zenity not available")
+
+        monkeypatch.setattr(validation, "_dialog_backends", (broken_okcancel, lambda **kwargs: 1))
+        assert validation._ask_okcancel("title", "message") == 1
+        # The preferred backend is retried for every dialog
+        assert validation._ask_okcancel("title", "message") == 1
+        assert calls == ["zenity", "zenity"]